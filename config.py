@@ -4,6 +4,10 @@ class Config:
     WECOM_WEBHOOK = ""
     
     WECOM_MESFOOTER = "【消息由GIT-push-new-stock-everyday发送】"
+
+    # 无新股/无新上市的日子是否仍然推送"今天没有..."消息
+    # （False时空数据日不发webhook，只落推送标记）
+    PUSH_ON_EMPTY = False
     
     # 日志配置
     LOG_LEVEL = "INFO"
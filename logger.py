@@ -1,3 +1,4 @@
+import sys
 import logging
 from config import Config
 
@@ -5,20 +6,23 @@ def get_logger(name):
     """获取配置好的日志器"""
     logger = logging.getLogger(name)
     logger.setLevel(Config.LOG_LEVEL)
-    
-    # 避免重复添加处理器
-    if logger.handlers:
-        return logger
-    
+    # 不向root logger传播，避免root另有handler时日志重复输出
+    logger.propagate = False
+
+    # 按handler身份判断，避免重复添加同类控制台处理器
+    for handler in logger.handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream in (sys.stderr, sys.stdout):
+            return logger
+
     # 创建控制台处理器
     handler = logging.StreamHandler()
     handler.setLevel(Config.LOG_LEVEL)
-    
+
     # 创建格式化器
     formatter = logging.Formatter(Config.LOG_FORMAT)
     handler.setFormatter(formatter)
-    
+
     # 添加处理器到日志器
     logger.addHandler(handler)
-    
+
     return logger
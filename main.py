@@ -1,68 +1,133 @@
 import os
-import sys
 import json
-import logging
+import random
+import hashlib
 import requests
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
 from datetime import time
 from config import Config
-from stock_data import (
-    get_new_stock_subscriptions,
-    get_new_stock_listings,
-    read_new_stock_pushed_flag,
-    mark_new_stock_info_pushed,
-    read_listing_pushed_flag,
-    mark_listing_info_pushed,
-    get_beijing_time
-)
-
-# 初始化日志
-logging.basicConfig(
-    level=getattr(logging, Config.LOG_LEVEL, logging.INFO),
-    format=Config.LOG_FORMAT,
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-logger = logging.getLogger(__name__)
+from logger import get_logger
+from time_utils import get_beijing_time
+
+# 注意：stock_data依赖akshare/pandas，导入开销大，
+# 各函数内按需延迟导入，让"今日已推送"的快速路径完全绕开它。
+
+# 初始化日志（统一走logger.get_logger，不再额外调basicConfig配置root）
+logger = get_logger(__name__)
+
+# JSON序列化：优先用C实现的orjson，未安装时退回标准库
+# _dumps用于结果输出，_json_body用于webhook请求体（bytes）
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+    def _json_body(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def _json_body(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+# 环境变量在进程生命周期内不会变化，启动时读取一次即可
+_WECOM_WEBHOOK = os.getenv("WECOM_WEBHOOK", Config.WECOM_WEBHOOK)
+_TASK = os.getenv("TASK", "push_new_stock")
+_TEST_MODE = os.getenv("TEST_MODE", "false").lower() == "true"
+# 14:30强制提醒可通过环境变量关闭（默认开启）
+_ENABLE_FORCE_ALERT = os.getenv("ENABLE_FORCE_ALERT", "true").lower() == "true"
 
 
 # -------------------------
 # 时间判断工具函数（仅保留时间检查）
 # -------------------------
-def is_in_trading_hours():
+# 时段边界只构造一次
+_T_OPEN = time(9, 30)
+_T_CLOSE = time(15, 0)
+_T_1429 = time(14, 29)
+_T_1431 = time(14, 31)
+
+
+def is_in_trading_hours(now):
     """判断是否在交易时段（9:30-15:00）"""
-    now = get_beijing_time()
-    current_time = now.time()
-    return time(9, 30) <= current_time <= time(15, 0)
+    return _T_OPEN <= now.time() <= _T_CLOSE
 
 
-def is_1430_deadline():
+def is_1430_deadline(now):
     """判断当前是否是14:30最终检查点"""
-    now = get_beijing_time()
-    current_time = now.time()
     # 允许±1分钟误差
-    return time(14, 29) <= current_time <= time(14, 31)
+    return _T_1429 <= now.time() <= _T_1431
 
 
 # -------------------------
 # 消息推送函数
 # -------------------------
+# 复用TCP/TLS连接，避免每次推送都重新握手
+_SESSION = requests.Session()
+_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4))
+# 请求体统一走_json_body预序列化，Content-Type固定为JSON
+_SESSION.headers.update({"Content-Type": "application/json"})
+
+# Webhook重试策略（指数退避+随机抖动，仅对网络错误/5xx/429重试）
+_WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "3"))
+_WEBHOOK_BASE_DELAY = float(os.getenv("WEBHOOK_BASE_DELAY", "1.0"))
+_WEBHOOK_MAX_DELAY = float(os.getenv("WEBHOOK_MAX_DELAY", "30.0"))
+
+# 进程内串行化webhook发送，并发推送线程不会同时POST同一webhook
+_SEND_LOCK = threading.Lock()
+# 本次进程内已成功发送的消息哈希，避免并发/重试路径重复推送同一内容
+_SENT_DIGESTS = set()
+
+
 def send_wecom_message(message):
-    """发送消息（自动添加末尾）"""
-    wecom_webhook = os.getenv("WECOM_WEBHOOK", Config.WECOM_WEBHOOK)
+    """发送消息（自动添加末尾，失败时指数退避重试，进程内按内容去重）"""
+    wecom_webhook = _WECOM_WEBHOOK
     if not wecom_webhook:
         logger.error("企业微信Webhook未配置！")
         return False
 
-    try:
-        message_with_footer = f"{message}\n\n{Config.WECOM_MESFOOTER}"
-        payload = {"msgtype": "text", "text": {"content": message_with_footer}}
-        response = requests.post(wecom_webhook, json=payload)
-        response.raise_for_status()
-        return response.json().get("errcode") == 0
-    except Exception as e:
-        logger.error(f"消息发送失败: {str(e)}")
+    message_with_footer = f"{message}\n\n{Config.WECOM_MESFOOTER}"
+    payload = {"msgtype": "text", "text": {"content": message_with_footer}}
+    digest = hashlib.sha1(message_with_footer.encode("utf-8")).hexdigest()
+
+    with _SEND_LOCK:
+        if digest in _SENT_DIGESTS:
+            logger.info("相同内容本次运行已发送过，跳过重复推送")
+            return True
+        if _post_with_retry(wecom_webhook, payload):
+            _SENT_DIGESTS.add(digest)
+            return True
         return False
 
 
+def _post_with_retry(wecom_webhook, payload):
+    """带指数退避重试的POST（调用方需持有_SEND_LOCK）"""
+    for attempt in range(_WEBHOOK_MAX_RETRIES + 1):
+        try:
+            response = _SESSION.post(wecom_webhook, data=_json_body(payload), timeout=(3, 10))
+            status = response.status_code
+            # 4xx（除429）属于永久错误，重试无意义
+            if status != 429 and 400 <= status < 500:
+                logger.error(f"消息发送失败: HTTP {status}（不重试）")
+                return False
+            if 200 <= status < 300:
+                return response.json().get("errcode") == 0
+            logger.warning(f"消息发送失败: HTTP {status}（第{attempt + 1}次尝试）")
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"消息发送失败: {str(e)}（第{attempt + 1}次尝试）")
+
+        if attempt < _WEBHOOK_MAX_RETRIES:
+            delay = min(_WEBHOOK_BASE_DELAY * 2 ** attempt, _WEBHOOK_MAX_DELAY)
+            time_module.sleep(delay * (1 + random.random() * 0.25))
+
+    logger.error(f"消息发送失败: 重试{_WEBHOOK_MAX_RETRIES}次后仍未成功")
+    return False
+
+
 def send_force_alert():
     """14:30最终失败时发送强制提醒"""
     alert_msg = (
@@ -76,51 +141,77 @@ def send_force_alert():
 # -------------------------
 # 消息格式化
 # -------------------------
-def format_new_stock_subscriptions_message(new_stocks_df):
-    if new_stocks_df is None or new_stocks_df.empty:
-        return "【今日新股申购信息】\n今天没有可申购的新股哦～"
-
-    message = "【今日新股申购信息】\n"
-    for idx, (_, stock) in enumerate(new_stocks_df.iterrows(), 1):
-        message += f"""
-{idx}. {stock['股票简称']}（代码：{stock['股票代码']}）
-   • 发行价格：{stock['发行价格']}元
-   • 申购上限：{stock['申购上限']}
-   • 申购日期：{stock['申购日期']}
-"""
-    return message
-
-
-def format_new_stock_listings_message(new_listings_df):
-    if new_listings_df is None or new_listings_df.empty:
-        return "【今日新上市股票信息】\n今天没有新上市的股票哦～"
-
-    message = "【今日新上市股票信息】\n"
-    for idx, (_, stock) in enumerate(new_listings_df.iterrows(), 1):
-        message += f"""
-{idx}. {stock['股票简称']}（代码：{stock['股票代码']}）
-   • 发行价格：{stock['发行价格']}元
-   • 上市日期：{stock['上市日期']}
-"""
-    return message
+# 空数据日的固定文案只构造一次
+_EMPTY_SUB_MSG = "【今日新股申购信息】\n今天没有可申购的新股哦～"
+_EMPTY_LIST_MSG = "【今日新上市股票信息】\n今天没有新上市的股票哦～"
+
+# 条目模板定义一次，循环内只做字段替换
+_STOCK_ITEM_TMPL = """
+{idx}. {股票简称}（代码：{股票代码}）
+   • 发行价格：{发行价格}元
+   • 申购上限：{申购上限}
+   • 申购日期：{申购日期}
+""".format
+
+_LISTING_ITEM_TMPL = """
+{idx}. {股票简称}（代码：{股票代码}）
+   • 发行价格：{发行价格}元
+   • 上市日期：{上市日期}
+""".format
+
+
+def format_new_stock_subscriptions_message(new_stocks):
+    """new_stocks为stock_data.NewStockRecord列表"""
+    if not new_stocks:
+        return _EMPTY_SUB_MSG
+
+    # 轻量记录直接属性访问迭代；片段最后一次join
+    parts = ["【今日新股申购信息】\n"]
+    for idx, stock in enumerate(new_stocks, 1):
+        parts.append(_STOCK_ITEM_TMPL(
+            idx=idx, 股票简称=stock.name, 股票代码=stock.code,
+            发行价格=stock.price, 申购上限=stock.limit, 申购日期=stock.date,
+        ))
+    return "".join(parts)
+
+
+def format_new_stock_listings_message(new_listings):
+    """new_listings为stock_data.NewStockRecord列表"""
+    if not new_listings:
+        return _EMPTY_LIST_MSG
+
+    parts = ["【今日新上市股票信息】\n"]
+    for idx, stock in enumerate(new_listings, 1):
+        parts.append(_LISTING_ITEM_TMPL(
+            idx=idx, 股票简称=stock.name, 股票代码=stock.code,
+            发行价格=stock.price, 上市日期=stock.date,
+        ))
+    return "".join(parts)
 
 
 # -------------------------
 # 核心推送逻辑
 # -------------------------
-def push_new_stock_info(test_mode=False, force=False):
+def push_new_stock_info(now, test_mode=False, force=False):
     """推送新股申购信息（返回是否成功）"""
-    today = get_beijing_time().date()
+    from stock_data import get_new_stock_subscriptions, read_new_stock_pushed_flag, mark_new_stock_info_pushed
+
+    today = now.date()
     _, is_pushed = read_new_stock_pushed_flag(today)
 
     if test_mode or force or not is_pushed:
         logger.info(f"{'[测试]' if test_mode else ''} 开始爬取新股申购信息")
-        new_stocks_df = get_new_stock_subscriptions(test_mode=test_mode or force)
-        message = "[测试消息] " + format_new_stock_subscriptions_message(new_stocks_df) if test_mode else format_new_stock_subscriptions_message(new_stocks_df)
+        new_stocks = get_new_stock_subscriptions(test_mode=test_mode or force)
+        # 空数据日默认不打扰：直接落标记，不发webhook（测试模式仍然发送）
+        if not test_mode and not Config.PUSH_ON_EMPTY and not new_stocks:
+            mark_new_stock_info_pushed(now)
+            logger.info("今日无新股申购数据，跳过推送并标记")
+            return True
+        message = "[测试消息] " + format_new_stock_subscriptions_message(new_stocks) if test_mode else format_new_stock_subscriptions_message(new_stocks)
         send_success = send_wecom_message(message)
         
         if send_success and not test_mode:
-            mark_new_stock_info_pushed()
+            mark_new_stock_info_pushed(now)
             logger.info("新股信息推送成功并标记")
         return send_success
     else:
@@ -128,19 +219,25 @@ def push_new_stock_info(test_mode=False, force=False):
         return True  # 已推送视为成功
 
 
-def push_listing_info(test_mode=False, force=False):
+def push_listing_info(now, test_mode=False, force=False):
     """推送新上市信息（返回是否成功）"""
-    today = get_beijing_time().date()
+    from stock_data import get_new_stock_listings, read_listing_pushed_flag, mark_listing_info_pushed
+
+    today = now.date()
     _, is_pushed = read_listing_pushed_flag(today)
 
     if test_mode or force or not is_pushed:
         logger.info(f"{'[测试]' if test_mode else ''} 开始爬取新上市信息")
-        new_listings_df = get_new_stock_listings(test_mode=test_mode or force)
-        message = "[测试消息] " + format_new_stock_listings_message(new_listings_df) if test_mode else format_new_stock_listings_message(new_listings_df)
+        new_listings = get_new_stock_listings(test_mode=test_mode or force)
+        if not test_mode and not Config.PUSH_ON_EMPTY and not new_listings:
+            mark_listing_info_pushed(now)
+            logger.info("今日无新上市数据，跳过推送并标记")
+            return True
+        message = "[测试消息] " + format_new_stock_listings_message(new_listings) if test_mode else format_new_stock_listings_message(new_listings)
         send_success = send_wecom_message(message)
         
         if send_success and not test_mode:
-            mark_listing_info_pushed()
+            mark_listing_info_pushed(now)
             logger.info("新上市信息推送成功并标记")
         return send_success
     else:
@@ -148,6 +245,74 @@ def push_listing_info(test_mode=False, force=False):
         return True  # 已推送视为成功
 
 
+def _fetch_both(test_mode=False):
+    """并发执行两次独立抓取（纯I/O，socket等待期间GIL已释放）"""
+    from stock_data import get_new_stock_subscriptions, get_new_stock_listings
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="fetch") as executor:
+        f_sub = executor.submit(get_new_stock_subscriptions, test_mode=test_mode)
+        f_list = executor.submit(get_new_stock_listings, test_mode=test_mode)
+        return f_sub.result(), f_list.result()
+
+
+def push_all_info(now, test_mode=False, force=False):
+    """两类信息合并为一条消息推送（返回(新股成功, 上市成功)）
+
+    两类都待推送时只发一次webhook请求；只剩一类时回退到单独推送，
+    推送标记仍按类别独立维护。
+    """
+    from stock_data import (
+        read_new_stock_pushed_flag,
+        mark_new_stock_info_pushed,
+        read_listing_pushed_flag,
+        mark_listing_info_pushed,
+    )
+
+    today = now.date()
+    _, stock_pushed = read_new_stock_pushed_flag(today)
+    _, listing_pushed = read_listing_pushed_flag(today)
+    need_stock = test_mode or force or not stock_pushed
+    need_listing = test_mode or force or not listing_pushed
+
+    if not need_stock and not need_listing:
+        logger.info("新股申购与新上市信息今日均已推送，跳过")
+        return True, True
+    if not need_listing:
+        return push_new_stock_info(now, test_mode=test_mode, force=force), True
+    if not need_stock:
+        return True, push_listing_info(now, test_mode=test_mode, force=force)
+
+    logger.info(f"{'[测试]' if test_mode else ''} 开始爬取新股申购与新上市信息")
+    new_stocks, new_listings = _fetch_both(test_mode=test_mode or force)
+
+    # 空数据的板块默认不进消息（测试模式或PUSH_ON_EMPTY时照常包含）
+    include_empty = test_mode or Config.PUSH_ON_EMPTY
+    sections = []
+    if include_empty or new_stocks:
+        sections.append(format_new_stock_subscriptions_message(new_stocks))
+    if include_empty or new_listings:
+        sections.append(format_new_stock_listings_message(new_listings))
+
+    if not sections:
+        # 两类都没数据：只落标记，省掉整次webhook往返
+        if not test_mode:
+            mark_new_stock_info_pushed(now)
+            mark_listing_info_pushed(now)
+        logger.info("今日无新股申购及新上市数据，跳过推送并标记")
+        return True, True
+
+    combined = "\n\n".join(sections)
+    if test_mode:
+        combined = "[测试消息] " + combined
+
+    send_success = send_wecom_message(combined)
+    if send_success and not test_mode:
+        mark_new_stock_info_pushed(now)
+        mark_listing_info_pushed(now)
+        logger.info("合并消息推送成功并标记")
+    return send_success, send_success
+
+
 # -------------------------
 # 测试任务专用函数
 # -------------------------
@@ -155,15 +320,12 @@ def run_test_task():
     """测试任务：跳过所有检查，直接获取并推送新股信息"""
     logger.info("===== 测试任务开始 =====")
     logger.info("跳过所有检查，直接获取新股信息")
-    
-    # 强制获取并推送新股申购信息
-    stock_success = push_new_stock_info(test_mode=True, force=True)
-    
-    # 强制获取并推送新上市信息
-    listing_success = push_listing_info(test_mode=True, force=True)
-    
-    # 输出结果
+
     now = get_beijing_time()
+    # 强制获取并合并推送新股申购信息与新上市信息（见push_all_info）
+    stock_success, listing_success = push_all_info(now, test_mode=True, force=True)
+
+    # 输出结果
     response = {
         "status": "success" if stock_success and listing_success else "partial_success",
         "details": {
@@ -173,42 +335,70 @@ def run_test_task():
         "timestamp": now.strftime("%Y-%m-%d %H:%M:%S"),
         "message": "测试任务完成"
     }
-    print(json.dumps(response, indent=2, ensure_ascii=False))
+    print(_dumps(response))
     return response
 
 
 # -------------------------
 # 主入口（移除交易日判断）
 # -------------------------
+# 标记文件路径需与stock_data中的read_*_flag/mark_*_pushed保持一致
+_FLAG_DIR = "data/flags"
+
+
+def _flag_files(today):
+    """返回当日两类推送标记文件路径（与stock_data命名一致）"""
+    day = today.strftime("%Y%m%d")
+    return (
+        os.path.join(_FLAG_DIR, f"new_stock_pushed_{day}.txt"),
+        os.path.join(_FLAG_DIR, f"listing_pushed_{day}.txt"),
+    )
+
+
 def main():
-    task_type = os.getenv("TASK", "push_new_stock")
-    test_mode = os.getenv("TEST_MODE", "false").lower() == "true"
+    task_type = _TASK
+    test_mode = _TEST_MODE
     now = get_beijing_time()
     today = now.date()
 
+    # 快速路径：两类信息都已推送时直接返回，完全绕开stock_data重型导入
+    stock_flag, listing_flag = _flag_files(today)
+    if not test_mode and os.path.exists(stock_flag) and os.path.exists(listing_flag):
+        logger.info("新股申购与新上市信息今日均已推送，直接跳过")
+        response = {
+            "status": "skipped",
+            "timestamp": now.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        print(_dumps(response))
+        return response
+
     logger.info(f"===== 任务开始 =====")
     logger.info(f"当前时间: {now.strftime('%Y-%m-%d %H:%M:%S')}（北京时间）")
     logger.info(f"任务类型: {task_type} | 测试模式: {test_mode}")
-    logger.info(f"是否交易时段: {is_in_trading_hours()} | 是否14:30检查点: {is_1430_deadline()}")
+    logger.info(f"是否交易时段: {is_in_trading_hours(now)} | 是否14:30检查点: {is_1430_deadline(now)}")
     logger.info(f"====================")
 
     # 如果是测试定时任务，直接运行测试任务
     if test_mode and task_type == "push_new_stock":
         return run_test_task()
 
-    # 执行推送（不再判断是否为交易日）
-    stock_success = push_new_stock_info(test_mode=test_mode)
-    listing_success = push_listing_info(test_mode=test_mode)
+    # 执行推送（不再判断是否为交易日，两类信息合并为一条消息）
+    stock_success, listing_success = push_all_info(now, test_mode=test_mode)
 
     # 14:30最终检查：若仍失败则发送强制提醒
-    if not test_mode and is_1430_deadline():
+    if _ENABLE_FORCE_ALERT and not test_mode and is_1430_deadline(now):
         # 检查是否仍未推送成功
-        _, stock_pushed = read_new_stock_pushed_flag(today)
-        _, listing_pushed = read_listing_pushed_flag(today)
-        
+        stock_pushed = os.path.exists(stock_flag)
+        listing_pushed = os.path.exists(listing_flag)
+
         if not stock_pushed or not listing_pushed:
-            logger.warning("14:30最终检查：仍有信息未推送成功，发送强制提醒")
-            send_force_alert()
+            from stock_data import is_trading_day
+
+            if is_trading_day(today):
+                logger.warning("14:30最终检查：仍有信息未推送成功，发送强制提醒")
+                send_force_alert()
+            else:
+                logger.info("14:30最终检查：非交易日，不发送强制提醒")
 
     # 输出结果
     response = {
@@ -219,7 +409,7 @@ def main():
         },
         "timestamp": now.strftime("%Y-%m-%d %H:%M:%S")
     }
-    print(json.dumps(response, indent=2, ensure_ascii=False))
+    print(_dumps(response))
     return response
 
 
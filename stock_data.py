@@ -1,33 +1,185 @@
-import akshare as ak
+import dataclasses
 import pandas as pd
 import datetime
-import pytz
+import functools
 import os
+import pathlib
+import re
+import threading
+import time
 import logging
-from retrying import retry  # 接口重试装饰器
+import requests
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
+from logger import get_logger
+from time_utils import get_beijing_time
 
-# 初始化日志
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
-logger = logging.getLogger(__name__)
+try:
+    import ciso8601  # 可选依赖：C实现的ISO日期解析，比to_datetime的通用解析快数倍
+except ImportError:
+    ciso8601 = None
+
+# 初始化日志（不在import时动root logger，宿主应用可自行配置）
+logger = get_logger(__name__)
 
 
 # -------------------------
 # 工具函数
 # -------------------------
-@retry(stop_max_attempt_number=3, wait_fixed=2000)
+# 只对网络类异常重试（数据解析类bug重试也无济于事）；
+# 指数退避+抖动，避免固定间隔重试对上游造成同步冲击
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.1, max=2),
+    retry=retry_if_exception_type((requests.RequestException, ConnectionError, TimeoutError)),
+    reraise=True,
+)
 def akshare_retry(func, **kwargs):
     """AkShare接口重试封装"""
     return func(** kwargs)
 
 
-def get_beijing_time():
-    """获取当前北京时间（带时区）"""
-    tz_shanghai = pytz.timezone("Asia/Shanghai")
-    return datetime.datetime.now(tz_shanghai)
+_CACHE_DIR = "data/cache"
+_CAL_CACHE_FILE = os.path.join(_CACHE_DIR, "trade_cal.pkl")
+_CAL_CACHE_TTL_SECONDS = 7 * 86400  # 交易日历一年才调整一次，缓存一周足够
+
+
+def _write_cache(obj, path):
+    """先写临时文件再os.replace原子落盘，避免并发运行读到写一半的缓存"""
+    os.makedirs(_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        pd.to_pickle(obj, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=1)
+def _trade_date_set():
+    """A股交易日历全集（进程内只远程拉取一次，之后为O(1)集合查询）
+
+    解析结果另持久化到磁盘pickle，冷启动时一周内免远程拉取。
+    """
+    try:
+        if os.path.exists(_CAL_CACHE_FILE) and time.time() - os.path.getmtime(_CAL_CACHE_FILE) < _CAL_CACHE_TTL_SECONDS:
+            return pd.read_pickle(_CAL_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"读取交易日历缓存失败，回退远程拉取: {str(e)}")
+
+    # akshare延迟到真正要远程拉取时才导入（秒级导入开销，缓存命中路径完全跳过）
+    import akshare as ak
+
+    cal_df = akshare_retry(ak.tool_trade_date_hist_sina)
+    dates = frozenset(pd.to_datetime(cal_df["trade_date"]).dt.date)
+    try:
+        _write_cache(dates, _CAL_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"写入交易日历缓存失败: {str(e)}")
+    return dates
+
+
+def is_trading_day(date=None):
+    """判断是否为A股交易日"""
+    if date is None:
+        date = get_beijing_time().date()
+    # A股从不在周末开盘（调休只增加休市日，不会补周末交易），
+    # 周末直接短路，连日历缓存都不用查
+    if date.weekday() >= 5:
+        return False
+    try:
+        return date in _trade_date_set()
+    except Exception as e:
+        logger.error(f"获取交易日历失败: {str(e)}")
+        # 拿不到日历时退化为按工作日判断
+        return date.weekday() < 5
+
+
+_CACHE_TTL_SECONDS = 3600  # 数据源每天只更新一次，1小时内复用磁盘缓存足够
+# 两个getter并发冷启动时会同时miss lru_cache和磁盘缓存，
+# 用锁串行化拉取：后进的线程在锁内命中先进线程刚写的磁盘缓存
+_XGSGLB_FETCH_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4)
+def _fetch_xgsglb(date_key):
+    """按日缓存新股申购一览表（同一进程内只远程拉取一次）
+
+    进程内lru_cache之外再加一层磁盘pickle缓存：同一天内多次cron调用
+    复用首次拉取的结果，TTL过期后重新远程获取。
+    date_key仅作缓存键使用；返回的DataFrame在调用方之间共享，不要原地修改。
+    """
+    cache_file = os.path.join(_CACHE_DIR, f"xgsglb_{date_key.replace('-', '')}.pkl")
+    with _XGSGLB_FETCH_LOCK:
+        try:
+            if os.path.exists(cache_file) and time.time() - os.path.getmtime(cache_file) < _CACHE_TTL_SECONDS:
+                return pd.read_pickle(cache_file)
+        except Exception as e:
+            logger.warning(f"读取磁盘缓存失败，回退远程拉取: {str(e)}")
+
+        # 同_trade_date_set：缓存未命中才付akshare导入成本
+        import akshare as ak
+
+        df = akshare_retry(ak.stock_xgsglb_em)
+        try:
+            _write_cache(df, cache_file)
+        except Exception as e:
+            logger.warning(f"写入磁盘缓存失败: {str(e)}")
+        return df
+
+
+# -------------------------
+# 列名解析
+# -------------------------
+# 每个逻辑字段的关键词预编译成一个正则（C级匹配，关键词增多也不退化）；
+# 列名统一lower后匹配，中文关键词不受影响
+_COLUMN_PATTERNS = {
+    "date": re.compile("申购日期|ipo_date|issue_date"),
+    "listing": re.compile("上市日期|listing_date"),
+    "code": re.compile("代码|code"),
+    "name": re.compile("名称|简称|name"),
+    "price": re.compile("价格|price"),
+    "limit": re.compile("上限|limit"),
+}
+
+
+def _resolve_columns(df):
+    """一次扫描列名，解析各逻辑字段对应的实际列
+
+    结果只依赖表结构，调用方应在日期循环外解析一次后复用。
+    """
+    cols = dict.fromkeys(_COLUMN_PATTERNS)
+    for col in df.columns:
+        low = col.lower()
+        for key, pattern in _COLUMN_PATTERNS.items():
+            if cols[key] is None and pattern.search(low):
+                cols[key] = col
+    return cols
+
+
+def _normalize_date_strs(series):
+    """把日期列标准化为'%Y-%m-%d'字符串Series
+
+    数据源通常已直接返回ISO格式日期字符串，此时只截取前10位，
+    跳过整列to_datetime解析；其他类型才走完整解析。
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime("%Y-%m-%d")
+    if pd.api.types.is_string_dtype(series) or series.dtype == object:
+        strs = series.astype(str)
+        # 采样必须跳过缺失值：新版pandas的astype(str)会保留NaN（不转"nan"字符串），
+        # 而未上市新股的上市日期列常常首行就是空值
+        sample = next((s for s in strs.dropna() if isinstance(s, str) and s and s != "nan"), "")
+        if len(sample) >= 10 and sample[4] == "-" and sample[7] == "-":
+            return strs.str.slice(0, 10)
+        # 非标准ISO格式的字符串列：装了ciso8601时优先走C解析器
+        if ciso8601 is not None:
+            try:
+                return strs.map(lambda s: ciso8601.parse_datetime(s).strftime("%Y-%m-%d"))
+            except (ValueError, TypeError):
+                pass  # 个别值解析不了时回退pandas通用解析
+    return pd.to_datetime(series).dt.strftime("%Y-%m-%d")
 
 
 # -------------------------
@@ -54,11 +206,65 @@ def check_new_listing_completeness(df):
 # -------------------------
 # 核心爬取函数
 # -------------------------
-def get_new_stock_subscriptions(test_mode=False):
-    """获取新股申购信息"""
+@dataclasses.dataclass(slots=True, frozen=True)
+class NewStockRecord:
+    """单只新股的轻量记录
+
+    每日命中通常只有0~3条，用slots记录代替单行DataFrame，
+    省掉BlockManager/索引开销，下游直接属性访问即可迭代。
+    listing类记录的limit为None。
+    """
+    code: str
+    name: str
+    price: object
+    limit: object
+    date: str
+    kind: str = "股票"
+
+
+def records_to_dataframe(records, date_out_col="申购日期"):
+    """兼容helper：把记录列表转回旧的DataFrame形态（迁移期legacy调用用）"""
+    if not records:
+        return pd.DataFrame()
+    data = {
+        "股票代码": [r.code for r in records],
+        "股票简称": [r.name for r in records],
+        "发行价格": [r.price for r in records],
+    }
+    if records[0].limit is not None:
+        data["申购上限"] = [r.limit for r in records]
+    data[date_out_col] = [r.date for r in records]
+    data["类型"] = [r.kind for r in records]
+    return pd.DataFrame(data)
+
+
+# 申购/上市两类信息的全部差异集中在这里，主流程只写一份
+_KIND_SPECS = {
+    "subscription": {
+        "label": "新股申购",
+        "date_key": "date",              # _resolve_columns结果里的日期字段键
+        "date_out_col": "申购日期",
+        "with_limit": True,
+    },
+    "listing": {
+        "label": "新上市股票",
+        "date_key": "listing",
+        "date_out_col": "上市日期",
+        "with_limit": False,
+    },
+}
+
+
+def _get_stock_data(kind, test_mode=False):
+    """申购/上市信息共用的获取主流程，差异由_KIND_SPECS参数化
+
+    返回NewStockRecord列表，无数据或出错时返回空列表。
+    """
+    spec = _KIND_SPECS[kind]
+    label = spec["label"]
     try:
         today = get_beijing_time().date()
-        logger.info(f"{'[测试模式]' if test_mode else '[正常模式]'} 开始获取新股申购信息（目标日期：{today}）")
+        logger.info(f"{'[测试模式]' if test_mode else '[正常模式]'} 开始获取{label}信息（目标日期：{today}）")
 
         # 生成待尝试日期列表
         if test_mode:
@@ -66,200 +272,192 @@ def get_new_stock_subscriptions(test_mode=False):
         else:
             dates_to_try = [today]
 
-        # 遍历日期尝试获取数据
-        for date_obj in dates_to_try:
-            date_str = date_obj.strftime("%Y-%m-%d")
-            logger.info(f"尝试获取 {date_str} 的新股申购数据")
-
+        # 数据源每天更新一次，整表拉取一次后在内存中按日期筛选，
+        # 不再在日期循环里反复远程请求（两类信息共用同一次拉取）
+        try:
+            raw_df = _fetch_xgsglb(today.isoformat())
+        except Exception as e:
+            logger.error(f"AkShare接口调用失败: {str(e)}", exc_info=True)
+            return []
+
+        if raw_df.empty:
+            logger.warning("AkShare返回空数据")
+            return []
+
+        # columns.tolist()会实体化列表，DEBUG关闭时连参数都不求值
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("原始数据列名: %s | 数据行数: %d", raw_df.columns.tolist(), len(raw_df))
+
+        # 一次解析所有逻辑字段对应的列（只依赖表结构，与尝试日期无关）
+        cols = _resolve_columns(raw_df)
+        date_col = cols[spec["date_key"]]
+        code_col, name_col = cols["code"], cols["name"]
+        price_col, limit_col = cols["price"], cols["limit"]
+        if not date_col:
+            logger.warning(f"未找到{spec['date_out_col']}列")
+            return []
+        if not (code_col and name_col):
+            logger.warning("缺少股票代码/简称列")
+            return []
+
+        # 标准化日期格式（转换结果放本地Series，不回写共享的缓存表）
+        try:
+            date_strs = _normalize_date_strs(raw_df[date_col])
+        except Exception as e:
+            logger.error(f"日期格式转换失败: {str(e)}")
+            return []
+
+        # 一次isin圈定所有候选日期的行，之后只在这个小子集里按日期从新到旧尝试，
+        # 避免对整表做22次等值扫描
+        wanted = {d.strftime("%Y-%m-%d") for d in dates_to_try}
+        hit_mask = date_strs.isin(wanted)
+        hits = raw_df[hit_mask]
+        hit_strs = date_strs[hit_mask]
+
+        # 直接对实际命中的日期倒序遍历（ISO字符串按字典序即按时间序，最新优先），
+        # 不再对22个候选日逐一strftime+查找；数据不完整时自然回退到次新日期
+        for date_str in sorted(set(hit_strs), reverse=True):
             try:
-                raw_df = akshare_retry(ak.stock_xgsglb_em)
-                if raw_df.empty:
-                    logger.warning(f"{date_str} AkShare返回空数据，跳过")
-                    continue
-
-                logger.debug(f"原始数据列名: {raw_df.columns.tolist()} | 数据行数: {len(raw_df)}")
-
-                # 动态匹配日期列
-                date_col = next(
-                    (col for col in raw_df.columns
-                     if any(kw in col.lower() for kw in ["申购日期", "ipo_date", "issue_date"])),
-                    None
-                )
-                if not date_col:
-                    logger.warning(f"{date_str} 未找到日期列，跳过")
-                    continue
-
-                # 标准化日期格式
-                if not pd.api.types.is_datetime64_any_dtype(raw_df[date_col]):
-                    try:
-                        raw_df[date_col] = pd.to_datetime(raw_df[date_col]).dt.strftime("%Y-%m-%d")
-                    except Exception as e:
-                        logger.error(f"{date_str} 日期格式转换失败: {str(e)}")
-                        continue
-
-                # 筛选当前尝试日期的数据
-                target_df = raw_df[raw_df[date_col] == date_str].copy()
-                if target_df.empty:
-                    logger.info(f"{date_str} 无新股申购数据，继续尝试其他日期")
-                    continue
-
-                # 动态匹配核心字段
-                code_col = next((col for col in raw_df.columns if "代码" in col or "code" in col.lower()), None)
-                name_col = next((col for col in raw_df.columns if "名称" in col or "简称" in col or "name" in col.lower()), None)
-                price_col = next((col for col in raw_df.columns if "价格" in col or "price" in col.lower()), None)
-                limit_col = next((col for col in raw_df.columns if "上限" in col or "limit" in col.lower()), None)
-
-                if not (code_col and name_col):
-                    logger.warning(f"{date_str} 缺少股票代码/简称列，跳过")
+                # 筛选当前尝试日期的数据（仅扫描命中子集，只读不改，无需copy）
+                target_df = hits[hit_strs.values == date_str]
+
+                # 建表前就地校验必需字段，不完整直接跳过，
+                # 省掉建表后再对结果整表isnull扫描的第二遍
+                required = [code_col, name_col]
+                if price_col:
+                    required.append(price_col)
+                if spec["with_limit"] and limit_col:
+                    required.append(limit_col)
+                if not all(target_df[col].notna().any() for col in required):
+                    logger.warning(f"{date_str} 数据不完整，跳过")
                     continue
 
-                # 构建标准化结果表
-                result_df = target_df[[code_col, name_col]].rename(
-                    columns={code_col: "股票代码", name_col: "股票简称"}
-                )
-                result_df["发行价格"] = target_df.get(price_col, "未知")
-                result_df["申购上限"] = target_df.get(limit_col, "未知")
-                result_df["申购日期"] = date_str
-                result_df["类型"] = "股票"
-
-                if check_new_stock_completeness(result_df):
-                    logger.info(f"成功获取 {date_str} 新股申购数据（{len(result_df)}条）")
-                    return result_df[["股票代码", "股票简称", "发行价格", "申购上限", "申购日期", "类型"]]
+                # 命中行通常只有个位数，zip提取列直接构建轻量记录列表，
+                # 不再为几行数据开一个DataFrame
+                n = len(target_df)
+                codes = target_df[code_col].tolist()
+                names = target_df[name_col].tolist()
+                prices = target_df[price_col].tolist() if price_col else ["未知"] * n
+                if spec["with_limit"]:
+                    limits = target_df[limit_col].tolist() if limit_col else ["未知"] * n
                 else:
-                    logger.warning(f"{date_str} 数据不完整，跳过")
+                    limits = [None] * n
+                records = [
+                    NewStockRecord(code=c, name=nm, price=p, limit=l, date=date_str)
+                    for c, nm, p, l in zip(codes, names, prices, limits)
+                ]
+
+                logger.info(f"成功获取 {date_str} {label}数据（{len(records)}条）")
+                return records
 
             except Exception as e:
-                logger.error(f"{date_str} AkShare接口调用失败: {str(e)}", exc_info=True)
+                logger.error(f"{date_str} 数据处理失败: {str(e)}", exc_info=True)
 
-        logger.info(f"未找到有效新股申购数据")
-        return pd.DataFrame()
+        logger.info(f"未找到有效{label}数据")
+        return []
 
     except Exception as e:
-        error_msg = f"获取新股申购信息异常: {str(e)}"
+        error_msg = f"获取{label}信息异常: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        return pd.DataFrame()
+        return []
+
+
+def get_new_stock_subscriptions(test_mode=False):
+    """获取新股申购信息（NewStockRecord列表）"""
+    return _get_stock_data("subscription", test_mode=test_mode)
 
 
 def get_new_stock_listings(test_mode=False):
-    """获取新上市股票信息"""
-    try:
-        today = get_beijing_time().date()
-        logger.info(f"{'[测试模式]' if test_mode else '[正常模式]'} 开始获取新上市股票信息（目标日期：{today}）")
+    """获取新上市股票信息（NewStockRecord列表）"""
+    return _get_stock_data("listing", test_mode=test_mode)
 
-        # 生成待尝试日期列表
-        if test_mode:
-            dates_to_try = [today - datetime.timedelta(days=i) for i in range(0, 22)]
-        else:
-            dates_to_try = [today]
 
-        # 遍历日期尝试获取数据
-        for date_obj in dates_to_try:
-            date_str = date_obj.strftime("%Y-%m-%d")
-            logger.info(f"尝试获取 {date_str} 的新上市股票数据")
+# -------------------------
+# 防重复推送标记
+# -------------------------
+_FLAG_DIR = "data/flags"
+_flag_dir_ready = False
 
-            try:
-                raw_df = akshare_retry(ak.stock_xgsglb_em)
-                if raw_df.empty:
-                    logger.warning(f"{date_str} AkShare返回空数据，跳过")
-                    continue
 
-                logger.debug(f"原始数据列名: {raw_df.columns.tolist()} | 数据行数: {len(raw_df)}")
+def _ensure_flag_dir():
+    """标记目录每进程最多创建一次，避免每次读写都重复mkdir"""
+    global _flag_dir_ready
+    if not _flag_dir_ready:
+        os.makedirs(_FLAG_DIR, exist_ok=True)
+        _flag_dir_ready = True
 
-                # 动态匹配上市日期列
-                listing_date_col = next(
-                    (col for col in raw_df.columns
-                     if any(kw in col.lower() for kw in ["上市日期", "listing_date"])),
-                    None
-                )
-                if not listing_date_col:
-                    logger.warning(f"{date_str} 未找到上市日期列，跳过")
-                    continue
 
-                # 标准化日期格式
-                if not pd.api.types.is_datetime64_any_dtype(raw_df[listing_date_col]):
-                    try:
-                        raw_df[listing_date_col] = pd.to_datetime(raw_df[listing_date_col]).dt.strftime("%Y-%m-%d")
-                    except Exception as e:
-                        logger.error(f"{date_str} 日期格式转换失败: {str(e)}")
-                        continue
-
-                # 筛选当前日期数据
-                target_df = raw_df[raw_df[listing_date_col] == date_str].copy()
-                if target_df.empty:
-                    logger.info(f"{date_str} 无新上市股票数据，继续尝试其他日期")
-                    continue
+_pushed_flags = None
 
-                # 动态匹配核心字段
-                code_col = next((col for col in raw_df.columns if "代码" in col or "code" in col.lower()), None)
-                name_col = next((col for col in raw_df.columns if "名称" in col or "简称" in col or "name" in col.lower()), None)
-                price_col = next((col for col in raw_df.columns if "价格" in col or "price" in col.lower()), None)
 
-                if not (code_col and name_col):
-                    logger.warning(f"{date_str} 缺少股票代码/简称列，跳过")
-                    continue
+def _pushed_flag_names():
+    """已存在的标记文件名集合（首次使用listdir一次，之后为O(1)集合查询）"""
+    global _pushed_flags
+    if _pushed_flags is None:
+        _ensure_flag_dir()
+        _pushed_flags = set(os.listdir(_FLAG_DIR))
+    return _pushed_flags
 
-                # 构建标准化结果表
-                result_df = target_df[[code_col, name_col]].rename(
-                    columns={code_col: "股票代码", name_col: "股票简称"}
-                )
-                result_df["发行价格"] = target_df.get(price_col, "未知")
-                result_df["上市日期"] = date_str
-                result_df["类型"] = "股票"
-
-                if check_new_listing_completeness(result_df):
-                    logger.info(f"成功获取 {date_str} 新上市股票数据（{len(result_df)}条）")
-                    return result_df[["股票代码", "股票简称", "发行价格", "上市日期", "类型"]]
-                else:
-                    logger.warning(f"{date_str} 数据不完整，跳过")
 
-            except Exception as e:
-                logger.error(f"{date_str} AkShare接口调用失败: {str(e)}", exc_info=True)
+def _write_flag(flag_file):
+    """touch空文件落盘，并同步更新内存中的标记集合
 
-        logger.info(f"未找到有效新上市股票数据")
-        return pd.DataFrame()
+    下游只检查文件是否存在，不读内容；推送时间由文件名（日期）和
+    文件mtime体现，无需再写时间戳正文。
+    """
+    pathlib.Path(flag_file).touch(exist_ok=True)
+    _pushed_flag_names().add(os.path.basename(flag_file))
 
-    except Exception as e:
-        error_msg = f"获取新上市股票信息异常: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return pd.DataFrame()
+
+class FlagStore:
+    """按文件名前缀管理一类推送标记，读写逻辑只写一份
+
+    两类标记放在同一目录，目录创建和listdir缓存仍由模块级helpers共享。
+    """
+
+    def __init__(self, prefix, label):
+        self.prefix = prefix
+        self.label = label
+
+    def path_for(self, date):
+        """返回指定日期的标记文件路径"""
+        return os.path.join(_FLAG_DIR, f"{self.prefix}_{date.strftime('%Y%m%d')}.txt")
+
+    def is_pushed(self, date):
+        """检查指定日期是否已推送，返回(标记文件路径, 是否已推送)"""
+        flag_file = self.path_for(date)
+        return flag_file, os.path.basename(flag_file) in _pushed_flag_names()
+
+    def mark(self, now=None):
+        """标记今日已推送（now可由调用方传入，避免重复取当前时间）"""
+        if now is None:
+            now = get_beijing_time()
+        _ensure_flag_dir()
+        flag_file = self.path_for(now)
+        _write_flag(flag_file)
+        logger.info(f"{self.label}信息推送标记已创建: {flag_file}")
+        return flag_file
+
+
+NEW_STOCK_FLAGS = FlagStore("new_stock_pushed", "新股申购")
+LISTING_FLAGS = FlagStore("listing_pushed", "新上市股票")
 
 
-# -------------------------
-# 防重复推送标记
-# -------------------------
 def read_new_stock_pushed_flag(date):
     """检查新股申购信息是否已推送"""
-    flag_dir = "data/flags"
-    os.makedirs(flag_dir, exist_ok=True)
-    flag_file = os.path.join(flag_dir, f"new_stock_pushed_{date.strftime('%Y%m%d')}.txt")
-    return flag_file, os.path.exists(flag_file)
+    return NEW_STOCK_FLAGS.is_pushed(date)
 
 
-def mark_new_stock_info_pushed():
+def mark_new_stock_info_pushed(now=None):
     """标记新股申购信息已推送"""
-    flag_dir = "data/flags"
-    os.makedirs(flag_dir, exist_ok=True)
-    flag_file = os.path.join(flag_dir, f"new_stock_pushed_{get_beijing_time().strftime('%Y%m%d')}.txt")
-    with open(flag_file, "w", encoding="utf-8") as f:
-        f.write(f"Pushed at {get_beijing_time().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"新股申购信息推送标记已创建: {flag_file}")
-    return flag_file
+    return NEW_STOCK_FLAGS.mark(now)
 
 
 def read_listing_pushed_flag(date):
     """检查新上市股票信息是否已推送"""
-    flag_dir = "data/flags"
-    os.makedirs(flag_dir, exist_ok=True)
-    flag_file = os.path.join(flag_dir, f"listing_pushed_{date.strftime('%Y%m%d')}.txt")
-    return flag_file, os.path.exists(flag_file)
+    return LISTING_FLAGS.is_pushed(date)
 
 
-def mark_listing_info_pushed():
+def mark_listing_info_pushed(now=None):
     """标记新上市股票信息已推送"""
-    flag_dir = "data/flags"
-    os.makedirs(flag_dir, exist_ok=True)
-    flag_file = os.path.join(flag_dir, f"listing_pushed_{get_beijing_time().strftime('%Y%m%d')}.txt")
-    with open(flag_file, "w", encoding="utf-8") as f:
-        f.write(f"Pushed at {get_beijing_time().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info(f"新上市股票信息推送标记已创建: {flag_file}")
-    return flag_file
+    return LISTING_FLAGS.mark(now)
@@ -0,0 +1,10 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+# 时区对象构造一次全程复用；zoneinfo为标准库，导入远快于pytz
+_SHANGHAI_TZ = ZoneInfo("Asia/Shanghai")
+
+
+def get_beijing_time():
+    """获取当前北京时间（带时区）"""
+    return datetime.datetime.now(_SHANGHAI_TZ)